@@ -224,7 +224,8 @@ class CompartmentedModel(Process):
         '''Reset the model ready to be built.'''
         super(CompartmentedModel, self).reset()
         self._compartments = dict()            # compartment -> initial probability
-        self._effects = dict()                 # compartment -> event handlers
+        self._effects = dict()                 # compartment -> event handlers (an empty list is added
+                                               # by _compartmentHandle() for compartments without loci)
 
     def setUp(self, params):
         '''Set up the initial population of nodes into compartments.
@@ -309,6 +310,15 @@ class CompartmentedModel(Process):
         :returns: a collection of nodes'''
         return [ n for n in self.network().nodes() if self.getCompartment(n) == c ]
 
+    def compartmentSize(self, c):
+        '''Return the number of nodes currently in a particular compartment. The default
+        counts the nodes returned by :meth:`compartment`: sub-classes that keep track of
+        compartment sizes can override this to be faster.
+
+        :param c: the compartment
+        :returns: the number of nodes in the compartment'''
+        return len(self.compartment(c))
+
     def results(self):
         '''Create a dict of experimental results for the experiment, consisting of the final
         sizes of all the compartments.
@@ -318,7 +328,7 @@ class CompartmentedModel(Process):
 
         # add size of each compartment
         for c in self.compartments():
-            rc[c] = len(self.compartment(c))
+            rc[c] = self.compartmentSize(c)
         return rc
 
     def skeletonise(self):
@@ -434,27 +444,23 @@ class CompartmentedModel(Process):
                 for (ah, _, _, _) in self._effects[c]:
                     ah(g, e)
 
-    def _callLeaveHandlers( self, e, c ):
-        '''Call all handlers affected by a node or edge leaving a compartment.
+    def _callLeaveHandlers( self, n, effects ):
+        '''Call the handlers for a node leaving a compartment.
 
-        :param e: the node or edge
-        :param c: the compartment'''
+        :param n: the node
+        :param effects: the handlers of the compartment being left'''
         g = self.network()
-        for c in self._handlerCompartments(e):
-            if c in self._effects.keys():
-                for (_, lh, _, _) in self._effects[c]:
-                    lh(g, e)
+        for (_, lh, _, _) in effects:
+            lh(g, n)
 
-    def _callEnterHandlers( self, e, c ):
-        '''Call all handlers affected by a node or edge entering a compartment.
+    def _callEnterHandlers( self, n, effects ):
+        '''Call the handlers for a node entering a compartment.
 
-        :param e: the node or edge
-        :param c: the compartment'''
+        :param n: the node
+        :param effects: the handlers of the compartment being entered'''
         g = self.network()
-        for c in self._handlerCompartments(e):
-            if c in self._effects.keys():
-                for (_, _, eh, _) in self._effects[c]:
-                    eh(g, e) 
+        for (_, _, eh, _) in effects:
+            eh(g, n)
 
     def _callRemoveHandlers( self, e ):
         '''Call all handlers affected by a node or edge being removed from the network.
@@ -482,7 +488,8 @@ class CompartmentedModel(Process):
         g.nodes[n][self.COMPARTMENT] = c
 
         # propagate the change to any other compartments
-        self._callEnterHandlers(n, c)
+        if c in self._effects.keys():
+            self._callEnterHandlers(n, self._effects[c])
 
     def getCompartment(self, n):
         '''Return the compartment of a node.
@@ -496,18 +503,64 @@ class CompartmentedModel(Process):
 
         :param n: the node
         :param c: the new compartment for the node'''
-        g = self.network()
-        oc = g.nodes[n][self.COMPARTMENT]
+        self._changeCompartmentWith(n, self._compartmentHandle(c))
+
+    def _compartmentHandle( self, c ):
+        '''Return a handle for a compartment, consisting of the compartment and the
+        list of handlers for loci affected by nodes entering or leaving it. The
+        list is shared with the model, so the handle remains valid as further
+        loci are added: for a compartment that doesn't yet have any loci, this
+        means adding an empty list of handlers to the model. Event functions can retrieve handles for the
+        compartments they move nodes into once, when the model is built,
+        and pass them to :meth:`_changeCompartmentWith` to avoid looking-up
+        the handlers for every event. Sub-classes may extend handles with
+        further elements of their own after the first two.
+
+        :param c: the compartment
+        :returns: the handle'''
+        if c not in self._effects.keys():
+            self._effects[c] = []
+        return (c, self._effects[c])
+
+    def _changeCompartmentWith( self, n, h ):
+        '''Change the compartment of a node, given a handle for its new
+        compartment as returned by :meth:`_compartmentHandle`.
+
+        :param n: the node
+        :param h: the handle of the new compartment for the node'''
+        data = self.network().nodes[n]
+        oc = data[self.COMPARTMENT]
 
         # propagate effects of leaving the current compartment
-        if oc is not None:
-            self._callLeaveHandlers(n, oc)
+        if (oc is not None) and (oc in self._effects.keys()):
+            self._callLeaveHandlers(n, self._effects[oc])
 
         # record new compartment on node
-        g.nodes[n][self.COMPARTMENT] = c
+        data[self.COMPARTMENT] = h[0]
 
         # propagate effects of entering new compartment
-        self._callEnterHandlers(n, c)
+        self._callEnterHandlers(n, h[1])
+
+    def _compartmentChanger( self ):
+        '''Return a function that changes the compartment of a node given a handle,
+        for event functions to use. Normally this is :meth:`_changeCompartmentWith`.
+        If a sub-class has overridden :meth:`changeCompartment`, the function instead
+        calls :meth:`changeCompartment` so that the override still sees every
+        change made by the events.
+
+        :returns: a function taking a node and a compartment handle'''
+        if type(self).changeCompartment is CompartmentedModel.changeCompartment:
+            return self._changeCompartmentWith
+        else:
+            return self._changeCompartmentByName
+
+    def _changeCompartmentByName( self, n, h ):
+        '''Change the compartment of a node given a handle, by way of
+        :meth:`changeCompartment`.
+
+        :param n: the node
+        :param h: the handle of the new compartment for the node'''
+        self.changeCompartment(n, h[0])
 
     def markOccupied( self, e, t ):
         '''Mark the given edge as having been occupied by the dynamics, i.e., to
@@ -18,11 +18,16 @@
 # along with epydemic. If not, see <http://www.gnu.org/licenses/gpl.html>.
 
 from epydemic import Process
+import math
+import numpy
 
 class Monitor(Process):
     '''Add progress monitoring to a process. This class captures the
     sizes of all loci in the process at regular intervals, returning
-    them as time series.'''
+    them as time series.
+
+    Internally the observations are stored as a single matrix, with one row
+    per observation and one column per locus.'''
     
     # Experimental parameters
     DELTA = "epydemic.Monitor.time_delta"           #: Parameter for the time interval for observations.
@@ -30,6 +35,9 @@ class Monitor(Process):
     # Results
     OBSERVATIONS = 'epydemic.Monitor.observations'  #: Result holding the times of the observations.
     TIMESERIES = "epydemic.Monitor.timeseries"      #: Result holding a dict mapping locus names to a dict of sample time and size.
+
+    # Storage
+    INITIAL_SAMPLES_LIMIT = 10000                   #: Largest number of observations allocated space for before the run starts.
  
 
     def __init__(self):
@@ -38,51 +46,172 @@ class Monitor(Process):
     def reset(self):
         '''Reset the process.'''
         super(Monitor, self).reset()
-        self._timeSeries = None
+        self._matrix = None
+        self._samples = 0
+        self._cursor = 0
+        self._lociCached = None
         
     def build(self, params):
-        '''Build the observation process.
+        '''Build the observation process. The repeating observation event
+        itself is posted by :meth:`setUp`, once the loci are known.
         
         :param params: the experimental parameters'''
         super(Monitor, self).build(params)
  
-        # post a repeating event to observe the process
-        delta = params[self.DELTA]
-        self.postRepeatingEvent(0.0, delta, None, self.observe)
+        self._t0 = 0.0
+        self._delta = params[self.DELTA]
+
+    def setUp(self, params):
+        '''Set up the observation process, allocating the matrix that will hold
+        the time series, with one column per locus.
+
+        This can't be done as part of :meth:`build`, as the loci depend on which
+        other processes we're composed with and in what order: a process
+        that calls the base :meth:`build` before defining its own loci
+        will only have defined them once *all* of :meth:`build` has run. The loci
+        all exist by the time the dynamics calls :meth:`setUp`, and must not
+        change thereafter.
+
+        :param params: the experimental parameters'''
+        super(Monitor, self).setUp(params)
+
+        # snapshot the (name, locus) pairs, so observations don't have to
+        # go back through the dynamics to find the loci: their order
+        # (the order in which they were added) gives the order of the columns
+        n = self._capacity()
+        self._samples = n
+        self._lociCached = self.lociArray()
+        self._matrix = numpy.empty((n, len(self._lociCached)), dtype=numpy.int64)
+        self._cursor = 0
+
+        # post a repeating event to observe the process, using the
+        # specialised observer unless observe() has been overridden
+        if type(self).observe is Monitor.observe:
+            ef = self._observer()
+        else:
+            ef = self.observe
+        self.postRepeatingEvent(self._t0, self._delta, None, ef)
         
+    def _capacity(self):
+        '''Return the number of observations we expect to make, based on the
+        observation interval and the maximum simulation time. Stochastic
+        dynamics usually overshoots the maximum time by a few events,
+        so we allow some headroom for the observations made in the overshoot.
+        The expectation is capped at :attr:`INITIAL_SAMPLES_LIMIT`, so that a very
+        long (or infinite) maximum time doesn't reserve huge amounts of storage
+        for a run that may well stop early. Observations may still continue
+        past the capacity, in which case the storage is grown as needed.
+
+        :returns: the expected number of observations'''
+        # expected observations, capped
+        t = self.maximumTime() / self._delta
+        if math.isfinite(t):
+            n = min(int(t) + 1, self.INITIAL_SAMPLES_LIMIT)
+        else:
+            n = self.INITIAL_SAMPLES_LIMIT
+
+        # headroom for overshoot, applied to the capped expectation
+        return n + n // 10 + 1
+
+    def _grow(self):
+        '''Double the number of observations the matrix can hold.'''
+        m = numpy.empty((2 * self._samples, self._matrix.shape[1]), dtype=numpy.int64)
+        m[:self._samples] = self._matrix
+        self._matrix = m
+        self._samples = 2 * self._samples
+
+    # Template for the source code of specialised observers
+    _OBSERVER_TEMPLATE = '''
+def makeObserver(self, matrix, {params}):
+    def observe(t, e, len = len):
+        nonlocal matrix
+        c = self._cursor
+        if c == self._samples:
+            self._grow()
+            matrix = self._matrix
+        matrix[c] = ({sizes})
+        self._cursor = c + 1
+    return observe
+'''
+
+    def _observer(self):
+        '''Return an event function that makes observations in the same way as
+        :meth:`observe`, but specialised to the loci being observed. The
+        function's code is generated to contain one straight-line size query
+        per locus, with no loop, and with the loci and matrix bound into
+        local variables rather than being looked-up as attributes
+        at every observation.
+
+        :returns: an event function'''
+        loci = [ l for (_, l) in self._lociCached ]
+        ls = [ '_L{i}'.format(i = i) for i in range(len(loci)) ]
+        src = self._OBSERVER_TEMPLATE.format(params = ''.join([ l + ', ' for l in ls ]),
+                                             sizes = ''.join([ 'len({l}), '.format(l = l) for l in ls ]))
+        ns = dict()
+        exec(compile(src, '<epydemic.Monitor observer>', 'exec'), ns)
+        return ns['makeObserver'](self, self._matrix, *loci)
+
     def observe(self, t, e):
         '''Observe the network, capturing the sizes of all loci which are then
-        stored into individual time series. Another time series, tagged 
-        :attr:`OBSERVATIONS`, is created to store the sequence of times at which observations
-        were made.
+        stored into individual time series. Observations are made at regular intervals
+        from time zero, so the observation times aren't stored: they're
+        re-constructed by :meth:`results`.
         
         :param t: the current simulation time
         :param e: the element (ignored)'''
  
-        # if this is the first run, build the initial dicts: one
-        # per locus and one for the observation times
-        # (We can't do this as part of build() as it depends on which
-        # other processes we're composed with, and in what order)
-        if self._timeSeries is None:
-            self._timeSeries = dict()
-            self._timeSeries[self.OBSERVATIONS] = []
-            for n in self.dynamics().loci().keys():   # loci for all processes in this experiment
-                self._timeSeries[n] = []
-
-        # make the observation
-        self._timeSeries[self.OBSERVATIONS].append(t)
-        for (n, l) in self.loci().items():
-            self._timeSeries[n].append(len(l))
+        # grow the matrix if we've over-run the expected number of observations
+        if self._cursor == self._samples:
+            self._grow()
+
+        # make the observation, filling the next row of the matrix
+        c = self._cursor
+        self._matrix[c] = tuple(len(l) for (_, l) in self._lociCached)
+        self._cursor = c + 1
         
+    def timeSeries(self):
+        '''Return the observations made so far as ``numpy`` arrays, ready
+        for vectorised analysis. The matrix of sizes has one row per observation
+        and one column per locus, and is a view onto the monitor's own
+        storage rather than a copy.
+
+        :returns: a triple of an array of observation times, a list of locus names, and a matrix of locus sizes'''
+        c = self._cursor
+        times = self._t0 + self._delta * numpy.arange(c)
+        names = [ n for (n, _) in self._lociCached ]
+        return (times, names, self._matrix[:c])
+
+    @staticmethod
+    def timeSeriesMatrix(ts):
+        '''Convert the time series in a :attr:`TIMESERIES` result back into
+        ``numpy`` arrays in the same form as returned by :meth:`timeSeries`.
+        This is useful for analysing results retrieved from a notebook.
+
+        :param ts: the time series dict
+        :returns: a triple of an array of observation times, a list of locus names, and a matrix of locus sizes'''
+        times = numpy.array(ts[Monitor.OBSERVATIONS])
+        names = [ n for n in ts.keys() if n != Monitor.OBSERVATIONS ]
+        matrix = numpy.empty((len(times), len(names)), dtype=numpy.int64)
+        for i in range(len(names)):
+            matrix[:, i] = ts[names[i]]
+        return (times, names, matrix)
+
     def results(self):
         '''Return the time series as a dict tagged :attr:`TIMESERIES`. There is
-        one time series *per* locus, plus one for the sequence of times at which the
-        observations were made.
+        one time series *per* locus, plus one tagged :attr:`OBSERVATIONS` for the
+        sequence of times at which the observations were made. The series are
+        stored as lists so that they can be saved in any notebook: use
+        :meth:`timeSeriesMatrix` to get them back as arrays.
         
         :returns: the results'''
         rc = super(Monitor, self).results()
         
-        # store the series
-        rc[self.TIMESERIES] = self._timeSeries
+        # store the series, trimmed to the observations actually made
+        (times, names, matrix) = self.timeSeries()
+        ts = dict()
+        ts[self.OBSERVATIONS] = times.tolist()
+        for i in range(len(names)):
+            ts[names[i]] = matrix[:, i].tolist()
+        rc[self.TIMESERIES] = ts
         
-        return rc
\ No newline at end of file
+        return rc
@@ -18,6 +18,46 @@
 # along with epydemic. If not, see <http://www.gnu.org/licenses/gpl.html>.
 
 from epydemic import CompartmentedModel
+import numpy
+
+
+def _changeState(state, counts, i, code):
+    '''Change the code held in a slot of the state array, keeping the
+    compartment counts up to date. A code of :attr:`SEIR.NO_COMPARTMENT_CODE`
+    empties the slot. This is the kernel underlying all compartment changes,
+    and is compiled to native code if `numba` is available: use :func:`_stateKernel`
+    to get the version to call.
+
+    :param state: the state array
+    :param counts: the compartment counts
+    :param i: the slot
+    :param code: the new code'''
+    oc = state[i]
+    if oc >= 0:
+        counts[oc] -= 1
+    state[i] = code
+    if code >= 0:
+        counts[code] += 1
+
+# The kernel actually used, compiled on first use
+_kernel = None
+
+def _stateKernel():
+    '''Return the kernel for changing the state array, compiling it the first
+    time it's needed if `numba` is installed. Deferring this keeps the cost of
+    importing and compiling out of importing `epydemic`, for which it would
+    otherwise be paid by every program whether or not it used the kernel.
+
+    :returns: the kernel'''
+    global _kernel
+    if _kernel is None:
+        try:
+            import numba
+            _kernel = numba.njit('void(int8[:], int64[:], int64, int64)', cache=True)(_changeState)
+        except ImportError:
+            _kernel = _changeState
+    return _kernel
+
 
 class SEIR(CompartmentedModel):
     '''The Susceptible-Exposed-Infected-Removed :term:`compartmented model of disease`.
@@ -35,7 +75,12 @@ class SEIR(CompartmentedModel):
     The SERI model in `epydemic` is very flexible, allowing different infection probabilities
     for susceptible-exposed or susceptible-infected interactions. The initial seed population
     is placed into :attr:`EXPOSED`, rather than into :attr:`INFECTED` as happens
-    for :class:`SIR`.'''
+    for :class:`SIR`.
+
+    As well as recording each node's compartment as a node attribute, the model
+    keeps a compact state array holding a small integer code for each node's
+    compartment, along with a count of the nodes in each compartment. This makes
+    querying compartments (and so generating results) fast even for large networks.'''
     
     # Model parameters
     P_EXPOSED = 'epydemic.SEIR.pExposed'              #: Parameter for probability of initially being exposed.
@@ -50,6 +95,13 @@ class SEIR(CompartmentedModel):
     INFECTED = 'epydemic.SEIR.I'           #: Compartment for nodes symptomatic and infectious.
     REMOVED = 'epydemic.SEIR.R'            #: Compartment for nodes recovered/removed.
 
+    # Codes for the compartments in the state array, in the order in which they're added
+    SUSCEPTIBLE_CODE = 0                   #: State array code for :attr:`SUSCEPTIBLE`.
+    EXPOSED_CODE = 1                       #: State array code for :attr:`EXPOSED`.
+    INFECTED_CODE = 2                      #: State array code for :attr:`INFECTED`.
+    REMOVED_CODE = 3                       #: State array code for :attr:`REMOVED`.
+    NO_COMPARTMENT_CODE = -1               #: State array code for a node not (yet) in a compartment.
+
     # Locus containing the edges at which dynamics can occur
     SE = 'epydemic.SEIR.SE'                #: Edge able to transmit infection from an exposed individual.
     SI = 'epydemic.SEIR.SI'                #: Edge able to transmit infection from an infected individual.
@@ -57,6 +109,18 @@ class SEIR(CompartmentedModel):
     def __init__( self ):
         super(SEIR, self).__init__()
 
+    def reset( self ):
+        '''Reset the model, emptying the state array.'''
+        super(SEIR, self).reset()
+        self._codes = dict()                   # compartment -> code
+        self._names = []                       # code -> compartment
+        self._counts = numpy.zeros(0, dtype=numpy.int64)                        # code -> number of nodes
+        self._state = numpy.full(0, self.NO_COMPARTMENT_CODE, dtype=numpy.int8)  # slot -> code
+        self._nodes = []                       # slot -> node
+        self._slots = dict()                   # node -> slot
+        self._free = []                        # slots released by removed nodes
+        self._changeState = _stateKernel()     # kernel for changing the state array
+
     def build( self, params ):
         '''Build the SEIR model.
 
@@ -84,6 +148,159 @@ class SEIR(CompartmentedModel):
         self.addEventPerElement(self.EXPOSED, pSymptoms, self.symptoms)
         self.addEventPerElement(self.INFECTED, pRemove, self.remove)
 
+        # memoise the handles for the compartments the events move nodes into
+        self._EXPOSED_h = self._compartmentHandle(self.EXPOSED)
+        self._INFECTED_h = self._compartmentHandle(self.INFECTED)
+        self._REMOVED_h = self._compartmentHandle(self.REMOVED)
+        self._changeTo = self._compartmentChanger()
+
+    def setUp( self, params ):
+        '''Set up the model, allocating a slot in the state array for every
+        node in the network before placing them into their initial compartments.
+
+        :param params: the simulation parameters'''
+        self._nodes = list(self.network().nodes())
+        self._slots = dict([ (n, i) for (i, n) in enumerate(self._nodes) ])
+        self._free = []
+        self._state = numpy.full(len(self._nodes), self.NO_COMPARTMENT_CODE, dtype=numpy.int8)
+        self._counts[:] = 0
+        super(SEIR, self).setUp(params)
+
+
+    # ---------- Managing compartments ----------
+
+    def addCompartment( self, c, p = 0.0 ):
+        '''Add a compartment to the model, allocating it the next code
+        for use in the state array.
+
+        :param c: the compartment name
+        :param p: the initial occupancy probability (defaults to  0.0)'''
+        super(SEIR, self).addCompartment(c, p)
+        self._code(c)
+
+    def _code( self, c ):
+        '''Return the code for a compartment in the state array. A compartment
+        of None (no compartment) has code :attr:`NO_COMPARTMENT_CODE`. Any
+        other compartment we haven't seen before is allocated the next code,
+        so nodes can be placed into compartments that weren't added to the model
+        explicitly.
+
+        :param c: the compartment
+        :returns: the compartment's code'''
+        if c is None:
+            return self.NO_COMPARTMENT_CODE
+        code = self._codes.get(c)
+        if code is None:
+            code = len(self._names)
+            self._codes[c] = code
+            self._names.append(c)
+            self._counts = numpy.append(self._counts, 0)
+        return code
+
+    def _slot( self, n ):
+        '''Return the slot in the state array for a node, allocating one
+        for nodes we haven't seen before. Slots released by removed nodes
+        are re-used, so the state array only grows when the network does.
+
+        :param n: the node
+        :returns: the node's slot'''
+        i = self._slots.get(n)
+        if i is None:
+            if len(self._free) > 0:
+                i = self._free.pop()
+                self._nodes[i] = n
+            else:
+                i = len(self._nodes)
+                self._nodes.append(n)
+                if i >= len(self._state):
+                    self._state = numpy.append(self._state, numpy.full(max(i, 1), self.NO_COMPARTMENT_CODE, dtype=numpy.int8))
+            self._slots[n] = i
+        return i
+
+    def _recordCompartment( self, n, c ):
+        '''Record a node's new compartment in the state array, keeping the
+        compartment counts up to date.
+
+        :param n: the node
+        :param c: the new compartment for the node'''
+        self._recordCode(n, self._code(c))
+
+    def _recordCode( self, n, code ):
+        '''Record a node's new compartment code in the state array, keeping the
+        compartment counts up to date.
+
+        :param n: the node
+        :param code: the code of the new compartment for the node'''
+        i = self._slot(n)                    # may grow the state array
+        self._changeState(self._state, self._counts, i, code)
+
+    def compartment( self, c ):
+        '''Return all the nodes currently in a particular compartment, found by
+        scanning the state array.
+
+        :param c: the compartment
+        :returns: a collection of nodes'''
+        code = self._codes.get(c)
+        if code is None:
+            return []
+        ns = self._nodes
+        return [ ns[i] for i in numpy.flatnonzero(self._state == code) ]
+
+    def compartmentSize( self, c ):
+        '''Return the number of nodes currently in a particular compartment.
+
+        :param c: the compartment
+        :returns: the number of nodes in the compartment'''
+        code = self._codes.get(c)
+        if code is None:
+            return 0
+        return int(self._counts[code])
+
+
+    # ---------- Accessing and evolving the network ----------
+
+    def setCompartment( self, n, c ):
+        '''Set the compartment of a new node, recording it in the state array.
+
+        :param n: the node
+        :param c: the new compartment for the node'''
+        super(SEIR, self).setCompartment(n, c)
+        self._recordCompartment(n, c)
+
+    def _compartmentHandle( self, c ):
+        '''Return a handle for a compartment, extended with the compartment's
+        code in the state array so that changing compartment needs no
+        further look-up of the code by name.
+
+        :param c: the compartment
+        :returns: the handle'''
+        return super(SEIR, self)._compartmentHandle(c) + (self._code(c), )
+
+    def _changeCompartmentWith( self, n, h ):
+        '''Change the compartment of a node, recording it in the state array.
+        All compartment changes pass through this method, whether made by
+        :meth:`changeCompartment` or by the event functions.
+
+        :param n: the node
+        :param h: the handle of the new compartment for the node'''
+        super(SEIR, self)._changeCompartmentWith(n, h)
+        self._recordCode(n, h[2])
+
+    def removeNode( self, n ):
+        '''Remove a node from the working network, releasing its slot
+        in the state array.
+
+        :param n: the node'''
+        super(SEIR, self).removeNode(n)
+        i = self._slots.pop(n, None)
+        if i is not None:
+            self._changeState(self._state, self._counts, i, self.NO_COMPARTMENT_CODE)
+            self._nodes[i] = None
+            self._free.append(i)
+
+
+    # ---------- Events ----------
+
     def infectAsymptomatic( self, t, e ):
         '''Perform an infection event when an :attr:`EXPOSED` individual infects
         a neighbouring :attr:`SUSCEPTIBLE`, rendering them :attr:`EXPOSED` in turn.  
@@ -97,12 +314,12 @@ class SEIR(CompartmentedModel):
 
     def infect( self, t, e ):
         '''Perform an infection event when an :attr:`INFECTED` individual infects
-        a neighbouring :attr:`SUSCEPTIBLE`, rendering them :attr:`EXPOSED` in turn.  
+        a neighbouring :attr:`SUSCEPTIBLE`, rendering them :attr:`EXPOSED` in turn.
         
         :param t: the simulation time
         :param e: the edge transmitting the infection'''
         (n, _) = e
-        self.changeCompartment(n, self.EXPOSED)
+        self._changeTo(n, self._EXPOSED_h)
         self.markOccupied(e, t)
 
     def symptoms( self, t, n ):
@@ -111,7 +328,7 @@ class SEIR(CompartmentedModel):
 
         :param t: the simulation time (unused)
         :param n: the node'''
-        self.changeCompartment(n, self.INFECTED)
+        self._changeTo(n, self._INFECTED_h)
 
     def remove( self, t, n ):
         '''Perform a removal event. This changes the compartment of
@@ -119,7 +336,7 @@ class SEIR(CompartmentedModel):
 
         :param t: the simulation time (unused)
         :param n: the node'''
-        self.changeCompartment(n, self.REMOVED)
+        self._changeTo(n, self._REMOVED_h)
     
                 
    
@@ -22,7 +22,6 @@ from epydemic import Dynamics
 import epyc
 import networkx
 import numpy
-from copy import copy
 
 class SynchronousDynamics(Dynamics):
     '''A dynamics that runs synchronously in discrete time, applying local
@@ -59,13 +58,17 @@ class SynchronousDynamics(Dynamics):
             dist = proc.perElementEventDistribution(t)
             for (l, p, ef) in dist:
                 if (len(l) > 0) and (p > 0.0):
-                    # run through every possible element on which this event may occur
-                    for e in copy(l.elements()):
-                        # test for occurrance of the event on this element
-                        if rng.random() <= p:
-                            # yes, perform the event
-                            ef(t, e)
-                            nev = nev + 1
+                    # draw the number of elements at which the event occurs
+                    # (each element independently with probability p), rather
+                    # than testing every element individually
+                    es = list(l.elements())
+                    k = rng.binomial(len(es), min(p, 1.0))
+                    if k > 0:
+                        # select that many distinct elements from those in the locus
+                        # at the start of the timestep, and perform the event on each
+                        for i in rng.choice(len(es), k, replace=False):
+                            ef(t, es[i])
+                        nev = nev + k
 
             # run through all the fixed-rate events for this timestep
             dist = proc.fixedRateEventDistribution(t)
@@ -104,6 +104,16 @@ class CompartmentedModelTest(unittest.TestCase):
         m.trackEdgesBetweenCompartments(SIR.REMOVED, SIR.SUSCEPTIBLE)
         self.assertIn("{l}-{r}".format(l = SIR.REMOVED, r = SIR.SUSCEPTIBLE), m.loci().keys())
 
+    def testLociArray( self ):
+        '''Test the loci array holds the same loci as the loci dict, in the order added.'''
+        m = SEIR()
+        e = StochasticDynamics(m, self._er)
+        e.setUp(dict([ (SEIR.P_EXPOSED, 0.01), (SEIR.P_INFECT_ASYMPTOMATIC, 0.1),
+                       (SEIR.P_INFECT_SYMPTOMATIC, 0.2), (SEIR.P_SYMPTOMS, 0.05), (SEIR.P_REMOVE, 0.05) ]))
+        m.trackNodesInCompartment(SEIR.REMOVED)
+        self.assertEqual(list(m.lociArray()), list(m.loci().items()))
+        self.assertEqual([ n for (n, _) in m.lociArray() ], [SEIR.SE, SEIR.SI, SEIR.EXPOSED, SEIR.INFECTED, SEIR.REMOVED])
+
     def testLoci( self ):
         '''Test we can populate loci correctly.'''
         g = networkx.Graph()
@@ -28,8 +28,23 @@ class MonitoredSIR(SIR, Monitor):
         super(MonitoredSIR, self).__init__()
 
 
+class MonitoredSEIR(SEIR, Monitor):
+
+    def __init__(self):
+        super(MonitoredSEIR, self).__init__()
+
+
 class MonitorTest(unittest.TestCase):
 
+    def setUp( self ):
+        '''Set up the experimental parameters and network.'''
+        self._params = dict()
+        self._params[SIR.P_INFECTED] = 0.01
+        self._params[SIR.P_INFECT] = 0.002
+        self._params[SIR.P_REMOVE] = 0.002
+        self._params[Monitor.DELTA] = 1.0
+        self._network = networkx.erdos_renyi_graph(1000, 5.0 / 1000)
+
     def testSimple( self ):
         '''Test we capture the right time series.'''
         m = MonitoredSIR()
@@ -53,5 +68,123 @@ class MonitorTest(unittest.TestCase):
         for k in [SIR.SI, SIR.INFECTED]:
             self.assertEqual(len(rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES][k]), n)
 
+    def testGrowing( self ):
+        '''Test we capture all observations when we make more than we allocated space for.'''
+        class LimitedMonitoredSIR(MonitoredSIR):
+            INITIAL_SAMPLES_LIMIT = 3
+
+        m = LimitedMonitoredSIR()
+        m.setMaximumTime(100)
+        e = StochasticDynamics(m, self._network)
+
+        rc = e.set(self._params).run()
+        ts = rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES]
+        self.assertGreaterEqual(len(ts[Monitor.OBSERVATIONS]), 100)
+        for i in range(len(ts[Monitor.OBSERVATIONS])):
+            self.assertAlmostEqual(ts[Monitor.OBSERVATIONS][i], i * 1.0)
+        n = len(ts[Monitor.OBSERVATIONS])
+        for k in [SIR.SI, SIR.INFECTED]:
+            self.assertEqual(len(ts[k]), n)
+
+    def testOverriddenObserve( self ):
+        '''Test that an overridden observation method is still called.'''
+        class CountingMonitoredSIR(MonitoredSIR):
+            def observe(self, t, e):
+                super(CountingMonitoredSIR, self).observe(t, e)
+                self._observed = self._observed + 1
+
+            def setUp(self, params):
+                self._observed = 0
+                super(CountingMonitoredSIR, self).setUp(params)
+
+        m = CountingMonitoredSIR()
+        m.setMaximumTime(100)
+        e = StochasticDynamics(m, self._network)
+
+        rc = e.set(self._params).run()
+        n = len(rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES][Monitor.OBSERVATIONS])
+        self.assertGreaterEqual(n, 100)
+        self.assertEqual(m._observed, n)
+
+    def testMatrix( self ):
+        '''Test we can get the time series as arrays, both directly and from the results.'''
+        m = MonitoredSIR()
+        m.setMaximumTime(100)
+        e = StochasticDynamics(m, self._network)
+
+        rc = e.set(self._params).run()
+        ts = rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES]
+        (times, names, matrix) = m.timeSeries()
+        self.assertCountEqual(names, [SIR.SI, SIR.INFECTED])
+        self.assertEqual(matrix.shape, (len(ts[Monitor.OBSERVATIONS]), 2))
+        self.assertEqual(times.tolist(), ts[Monitor.OBSERVATIONS])
+        for i in range(len(names)):
+            self.assertEqual(matrix[:, i].tolist(), ts[names[i]])
+
+        (times1, names1, matrix1) = Monitor.timeSeriesMatrix(ts)
+        self.assertEqual(times1.tolist(), times.tolist())
+        for i in range(len(names1)):
+            self.assertEqual(matrix1[:, i].tolist(), matrix[:, names.index(names1[i])].tolist())
+
+    def testSEIR( self ):
+        '''Test we can monitor a model that keeps its own state, composed by multiple inheritance.'''
+        m = MonitoredSEIR()
+        m.setMaximumTime(100)
+        e = StochasticDynamics(m, self._network)
+
+        param = dict()
+        param[SEIR.P_EXPOSED] = 0.01
+        param[SEIR.P_INFECT_ASYMPTOMATIC] = 0.002
+        param[SEIR.P_INFECT_SYMPTOMATIC] = 0.002
+        param[SEIR.P_SYMPTOMS] = 0.002
+        param[SEIR.P_REMOVE] = 0.002
+        param[Monitor.DELTA] = 1.0
+
+        rc = e.set(param).run()
+        ts = rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES]
+        self.assertSetEqual(set(ts.keys()), set([Monitor.OBSERVATIONS, SEIR.SE, SEIR.SI, SEIR.EXPOSED, SEIR.INFECTED]))
+        n = len(ts[Monitor.OBSERVATIONS])
+        self.assertGreaterEqual(n, 100)
+        for k in [SEIR.SE, SEIR.SI, SEIR.EXPOSED, SEIR.INFECTED]:
+            self.assertEqual(len(ts[k]), n)
+
+    def testUnboundedMaximumTime( self ):
+        '''Test we can monitor a process with a very long or infinite maximum time.'''
+        class EquilibriumMonitoredSIR(MonitoredSIR):
+            def atEquilibrium(self, t):
+                return (t >= 100) or super(EquilibriumMonitoredSIR, self).atEquilibrium(t)
+
+        for T in [ float('inf'), 1e12 ]:
+            m = EquilibriumMonitoredSIR()
+            m.setMaximumTime(T)
+            e = StochasticDynamics(m, self._network)
+            rc = e.set(self._params).run()
+            self.assertTrue(rc[epyc.Experiment.METADATA][epyc.Experiment.STATUS])
+            ts = rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES]
+            n = len(ts[Monitor.OBSERVATIONS])
+            self.assertGreaterEqual(n, 100)
+            for k in [SIR.SI, SIR.INFECTED]:
+                self.assertEqual(len(ts[k]), n)
+
+    def testCapacity( self ):
+        '''Test we capture all observations of an unbounded process when the initial allocation is limited.'''
+        class LimitedMonitoredSIR(MonitoredSIR):
+            INITIAL_SAMPLES_LIMIT = 10
+
+            def atEquilibrium(self, t):
+                return (t >= 100) or super(LimitedMonitoredSIR, self).atEquilibrium(t)
+
+        m = LimitedMonitoredSIR()
+        m.setMaximumTime(float('inf'))
+        e = StochasticDynamics(m, self._network)
+        rc = e.set(self._params).run()
+        ts = rc[epyc.Experiment.RESULTS][Monitor.TIMESERIES]
+        self.assertGreaterEqual(len(ts[Monitor.OBSERVATIONS]), 100)
+        for i in range(len(ts[Monitor.OBSERVATIONS])):
+            self.assertAlmostEqual(ts[Monitor.OBSERVATIONS][i], i * 1.0)
+        n = len(ts[Monitor.OBSERVATIONS])
+        for k in [SIR.SI, SIR.INFECTED]:
+            self.assertEqual(len(ts[k]), n)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -67,5 +67,121 @@ class SEIRTest(unittest.TestCase, CompartmentedDynamicsTest):
         self.assertTrue(rc[epyc.Experiment.RESULTS][SEIR.REMOVED] > 0)
         self.assertEqual(rc[epyc.Experiment.RESULTS][SEIR.SUSCEPTIBLE] + rc[epyc.Experiment.RESULTS][SEIR.REMOVED], self._network.order())
 
+    def testLoci( self ):
+        '''Test that infecting edges are tracked in separate loci, even when the infection probabilities are equal.'''
+        self._params[SEIR.P_INFECT_ASYMPTOMATIC] = self._params[SEIR.P_INFECT_SYMPTOMATIC]
+        e = StochasticDynamics(self._model, self._network)
+        e.setUp(self._params)
+        ls = self._model.loci()
+        self.assertIn(SEIR.SE, ls.keys())
+        self.assertIn(SEIR.SI, ls.keys())
+        e.tearDown()
+
+    def testOverriddenChangeCompartment( self ):
+        '''Test that an overridden changeCompartment() sees the changes made by events.'''
+        class RecordingSEIR(SEIR):
+            def reset(self):
+                super(RecordingSEIR, self).reset()
+                self._changes = []
+
+            def changeCompartment(self, n, c):
+                super(RecordingSEIR, self).changeCompartment(n, c)
+                self._changes.append((n, c))
+
+        m = RecordingSEIR()
+        e = StochasticDynamics(m, self._network)
+        e.set(self._params).run()
+        rs = set([ n for (n, c) in m._changes if c == SEIR.REMOVED ])
+        self.assertGreater(len(rs), 0)
+        self.assertCountEqual(rs, m.compartment(SEIR.REMOVED))
+
+    def testStateArray( self ):
+        '''Test the state array tracks the compartments of nodes.'''
+        e = StochasticDynamics(self._model, self._network)
+        e.set(self._params).run()
+        g = self._model.network()
+        for c in [SEIR.SUSCEPTIBLE, SEIR.EXPOSED, SEIR.INFECTED, SEIR.REMOVED]:
+            ns = [ n for n in g.nodes() if g.nodes[n][CompartmentedModel.COMPARTMENT] == c ]
+            self.assertCountEqual(self._model.compartment(c), ns)
+            self.assertEqual(self._model.compartmentSize(c), len(ns))
+
+    def testStateArrayAddRemove( self ):
+        '''Test the state array follows nodes being added and removed.'''
+        m = SEIR()
+        e = StochasticDynamics(m)
+        g = networkx.Graph()
+        m.setNetwork(g)
+        m.addCompartment(SEIR.SUSCEPTIBLE)
+        m.addCompartment(SEIR.EXPOSED)
+        m.addCompartment(SEIR.INFECTED)
+        m.addCompartment(SEIR.REMOVED)
+
+        ns = range(10)
+        m.addNodesFrom(ns, c = SEIR.SUSCEPTIBLE)
+        self.assertCountEqual(m.compartment(SEIR.SUSCEPTIBLE), ns)
+        m.changeCompartment(3, SEIR.EXPOSED)
+        m.changeCompartment(4, SEIR.INFECTED)
+        self.assertCountEqual(m.compartment(SEIR.EXPOSED), [3])
+        self.assertEqual(m.compartmentSize(SEIR.SUSCEPTIBLE), 8)
+        m.removeNode(3)
+        m.removeNode(5)
+        self.assertCountEqual(m.compartment(SEIR.EXPOSED), [])
+        self.assertEqual(m.compartmentSize(SEIR.EXPOSED), 0)
+        self.assertEqual(m.compartmentSize(SEIR.SUSCEPTIBLE), 7)
+        self.assertCountEqual(m.compartment(SEIR.INFECTED), [4])
+
+    def testStateArraySlotsReused( self ):
+        '''Test that compartments stay correct under churn, as removed nodes' slots are re-used.'''
+        m = SEIR()
+        e = StochasticDynamics(m)
+        g = networkx.Graph()
+        m.setNetwork(g)
+        m.addCompartment(SEIR.SUSCEPTIBLE)
+        m.addCompartment(SEIR.EXPOSED)
+
+        m.addNodesFrom(range(10), c = SEIR.SUSCEPTIBLE)
+        for n in range(10, 100):
+            m.removeNode(n - 10)
+            m.addNode(n, c = SEIR.EXPOSED)
+        self.assertCountEqual(m.compartment(SEIR.EXPOSED), range(90, 100))
+        self.assertEqual(m.compartmentSize(SEIR.SUSCEPTIBLE), 0)
+        self.assertEqual(m.compartmentSize(SEIR.EXPOSED), 10)
+
+    def testUnknownCompartment( self ):
+        '''Test that querying a compartment that hasn't been added behaves like the base class.'''
+        m = SEIR()
+        e = StochasticDynamics(m)
+        m.setNetwork(networkx.Graph())
+        m.addCompartment(SEIR.SUSCEPTIBLE)
+        m.addNodesFrom(range(5), c = SEIR.SUSCEPTIBLE)
+        self.assertEqual(m.compartment(SEIR.REMOVED), [])
+        self.assertEqual(m.compartmentSize(SEIR.REMOVED), 0)
+
+    def testNoCompartment( self ):
+        '''Test that a node can be added without a compartment, as in the base class.'''
+        m = SEIR()
+        e = StochasticDynamics(m)
+        m.setNetwork(networkx.Graph())
+        m.addCompartment(SEIR.SUSCEPTIBLE)
+        m.addNodesFrom(range(5), c = SEIR.SUSCEPTIBLE)
+        m.addNode(99, None)
+        self.assertIsNone(m.getCompartment(99))
+        self.assertEqual(m.compartmentSize(SEIR.SUSCEPTIBLE), 5)
+        m.changeCompartment(99, SEIR.SUSCEPTIBLE)
+        self.assertCountEqual(m.compartment(SEIR.SUSCEPTIBLE), [0, 1, 2, 3, 4, 99])
+
+    def testUndeclaredCompartment( self ):
+        '''Test that a node can be moved into a compartment that hasn't been added, as in the base class.'''
+        m = SEIR()
+        e = StochasticDynamics(m)
+        m.setNetwork(networkx.Graph())
+        m.addCompartment(SEIR.SUSCEPTIBLE)
+        m.addNodesFrom(range(5), c = SEIR.SUSCEPTIBLE)
+        m.changeCompartment(0, 'Q')
+        self.assertEqual(m.getCompartment(0), 'Q')
+        self.assertCountEqual(m.compartment('Q'), [0])
+        self.assertEqual(m.compartmentSize('Q'), 1)
+        self.assertEqual(m.compartmentSize(SEIR.SUSCEPTIBLE), 4)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,112 @@
+# Test synchronous dynamics generates believable per-element event traces
+#
+# Copyright (C) 2017--2020 Simon Dobson
+#
+# This file is part of epydemic, epidemic network simulations in Python.
+#
+# epydemic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# epydemic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with epydemic. If not, see <http://www.gnu.org/licenses/gpl.html>.
+
+import epyc
+from epydemic import *
+import networkx
+import unittest
+
+class PerElementCounter(Process):
+    def __init__(self):
+        super(PerElementCounter, self).__init__()
+
+    def build( self, params ):
+        self._eventCount = 0
+        self._repeats = 0
+        self._seen = dict()
+        self.addLocus('nodes')
+        self.addEventPerElement('nodes', params['p'], self.happened)
+
+    def setUp( self, params ):
+        l = self.locus('nodes')
+        g = self.network()
+        for n in g.nodes():
+            l.addHandler(g, n)
+
+    def happened( self, t, n ):
+        self._eventCount = self._eventCount + 1
+        if self._seen.get(n) == t:
+            self._repeats = self._repeats + 1
+        self._seen[n] = t
+
+    def results(self):
+        rc = dict()
+        rc['eventCount'] = self._eventCount
+        rc['repeats'] = self._repeats
+        return rc
+
+
+class OverCountingLocus(Locus):
+    def __init__(self, name):
+        super(OverCountingLocus, self).__init__(name)
+
+    def __len__(self):
+        return len(self.elements()) + 10
+
+
+class OverCountingCounter(PerElementCounter):
+    def build( self, params ):
+        self._eventCount = 0
+        self._repeats = 0
+        self._seen = dict()
+        self.addLocus('nodes', OverCountingLocus('nodes'))
+        self.addEventPerElement('nodes', params['p'], self.happened)
+
+
+class SynchronousRatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._N = 100
+        self._dyn = SynchronousDynamics(PerElementCounter(), networkx.empty_graph(self._N))
+        self._maxTime = 1000
+        self._dyn.process().setMaximumTime(self._maxTime)
+
+    def _checkRates(self, rc):
+        p = rc[epyc.Experiment.PARAMETERS]['p']
+        ec = rc[epyc.Experiment.RESULTS]['eventCount']
+        self.assertEqual(rc[epyc.Experiment.RESULTS]['repeats'], 0)
+        if p == 0:
+            self.assertEqual(ec, 0)
+        else:
+            self.assertAlmostEqual(((ec + 0.0) / (self._N * p)) / self._maxTime, 1.0, delta = 0.05)
+
+    def testRate(self):
+        '''Test per-element events occur in the correct proportion.'''
+        self._checkRates(self._dyn.set(dict(p = 0.1)).run())
+
+    def testHighRate(self):
+        '''Test per-element events occur in the correct proportion at high probabilities.'''
+        self._checkRates(self._dyn.set(dict(p = 0.9)).run())
+
+    def testCertain(self):
+        '''Test that certain per-element events happen to every element.'''
+        self._checkRates(self._dyn.set(dict(p = 1.0)).run())
+
+    def testZeroRate(self):
+        '''Test that a zero-probability event isn't generated.'''
+        self._checkRates(self._dyn.set(dict(p = 0.0)).run())
+
+    def testLengthDiffersFromElements(self):
+        '''Test that events are only drawn from the elements of a locus, even if its length differs.'''
+        self._dyn = SynchronousDynamics(OverCountingCounter(), networkx.empty_graph(self._N))
+        self._dyn.process().setMaximumTime(self._maxTime)
+        self._checkRates(self._dyn.set(dict(p = 1.0)).run())
+
+if __name__ == '__main__':
+    unittest.main()